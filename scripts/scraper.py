@@ -9,71 +9,327 @@ Usage:
     python scripts/scraper.py --all
 
 Requirements:
-    pip install requests beautifulsoup4 geopy
+    pip install requests requests-cache lxml geopy orjson
 """
 
-import json
 import argparse
+import email.utils
+import io
+import re
+import shelve
+import threading
 import time
-from datetime import datetime
-from typing import List, Dict, Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Dict, Optional, Set, Tuple
+import orjson
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from requests_cache import EXPIRE_IMMEDIATELY, CachedSession
+from urllib3.util.retry import Retry
 
 # Optional: Uncomment if you want to use geocoding
 # from geopy.geocoders import Nominatim
-# from geopy.exc import GeocoderTimedOut
+# from geopy.exc import GeocoderRateLimited, GeocoderServiceError, GeocoderTimedOut
+# from geopy.extra.rate_limiter import RateLimiter as GeocodeRateLimiter
+
+# Compiled once and reused for every listing row. The selector is a
+# placeholder until the Summit County page structure is mapped out.
+_ROW_LINK_XPATH = etree.XPath(".//a[@href][1]")
+
+# Keyword heuristics for infer_cuisine_type, checked in priority order
+CUISINE_KEYWORDS = {
+    "Italian": ["italian", "pizza", "pizzeria", "pasta", "trattoria"],
+    "Chinese": ["chinese", "china", "wok", "dragon"],
+    "Japanese": ["japanese", "sushi", "hibachi", "ramen"],
+    "Mexican": ["mexican", "taco", "burrito", "cantina", "mexico"],
+    "American": ["diner", "grill", "burger", "steakhouse", "bbq", "bar"],
+    "Indian": ["indian", "india", "curry", "tandoor"],
+    "Thai": ["thai", "thailand"],
+    "Mediterranean": ["mediterranean", "greek", "gyro", "kebab"],
+    "French": ["french", "bistro", "cafe"],
+}
+
+# One precompiled alternation per cuisine, so each name is scanned in C
+# rather than with a Python-level substring test per keyword
+CUISINE_PATTERNS = [
+    (cuisine, re.compile("|".join(map(re.escape, words)), re.IGNORECASE))
+    for cuisine, words in CUISINE_KEYWORDS.items()
+]
+
+@dataclass(slots=True)
+class Violation:
+    description: str
+    critical: bool
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Violation":
+        return cls(**data)
+
+@dataclass(slots=True)
+class Inspection:
+    date: str
+    critical_violations: int
+    violations: List[Violation] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Inspection":
+        return cls(**{**data, "violations": [Violation.from_dict(v) for v in data["violations"]]})
+
+@dataclass(slots=True)
+class Restaurant:
+    """
+    In-memory restaurant record. Field order matches the JSON schema, and
+    orjson serializes these dataclasses natively in save_data.
+    """
+    id: str
+    name: str
+    address: str
+    lat: float
+    lng: float
+    county: str
+    cuisine: str
+    inspections: List[Inspection] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Restaurant":
+        return cls(**{**data, "inspections": [Inspection.from_dict(i) for i in data["inspections"]]})
+
+def iter_table_rows(content: bytes) -> Iterator[etree._Element]:
+    """
+    Yield the <tr> elements of an HTML page without building its full DOM.
+    Each row is discarded once the caller moves on, so only the current row's
+    subtree is held alongside the page bytes, even for large listing pages.
+    """
+    for _, row in etree.iterparse(io.BytesIO(content), tag="tr", html=True):
+        yield row
+        row.clear()
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+
+def normalize_address(address: str) -> str:
+    """Normalize an address for use as a geocoding cache key."""
+    return " ".join(address.lower().replace(",", " ").split())
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        # Dates with no zone or a "-0000" zone parse as naive; HTTP dates are UTC
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class ServerErrorRetry(Retry):
+    """
+    urllib3 Retry that never retries 429 Too Many Requests.
+    The stock Retry still retries a 429 carrying Retry-After even when it is not
+    in status_forcelist; those are left to HealthInspectionScraper._get so the
+    shared RateLimiter can back off.
+    """
+    RETRY_AFTER_STATUS_CODES = Retry.RETRY_AFTER_STATUS_CODES - {429}
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces requests at least `interval` seconds apart.
+    Shared by all worker threads so concurrent scraping stays polite.
+
+    The interval adapts to the server: it doubles (up to max_interval) when the
+    server answers 429 Too Many Requests, and eases back toward min_interval
+    after each successful response. The default floor of one request per
+    second keeps the pace of the original sequential scraper.
+    """
+
+    def __init__(self, interval: float = 1.0, min_interval: float = 1.0, max_interval: float = 30.0):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        """Block until the next request slot is available."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def success(self):
+        """Speed up slightly after a successful response from the server."""
+        with self._lock:
+            self.interval = max(self.min_interval, self.interval * 0.9)
+
+    def backoff(self, retry_after: Optional[float] = None):
+        """Slow down after a 429, pausing all workers for retry_after seconds if given."""
+        with self._lock:
+            self.interval = min(self.max_interval, self.interval * 2)
+            if retry_after:
+                self._next_slot = max(self._next_slot, time.monotonic() + retry_after)
 
 class HealthInspectionScraper:
-    def __init__(self, output_file: str = "data/inspections.json"):
+    def __init__(
+        self,
+        output_file: str = "data/inspections.json",
+        max_workers: int = 4,
+        geocode_cache_file: str = "data/geocode_cache.db",
+        http_cache_file: str = "data/http_cache.sqlite"
+    ):
         self.output_file = output_file
-        self.restaurants: List[Dict] = []
-        # Uncomment to use geocoding
+        self.restaurants: List[Restaurant] = []
+        # Restaurant id -> position in self.restaurants, for O(1) merges
+        self._id_index: Dict[str, int] = {}
+        # Restaurant id -> inspection dates already recorded
+        self._inspection_dates: Dict[str, Set[str]] = {}
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter()
+
+        # Shared session so keep-alive connections are reused across requests.
+        # Responses are cached and revalidated with ETag/Last-Modified on every
+        # request, so unchanged pages come back as a bodiless 304. Cache-Control
+        # headers are ignored so no page is ever served without asking the
+        # server, and errors are never answered from the cache.
+        self.session = CachedSession(
+            http_cache_file,
+            backend="sqlite",
+            expire_after=EXPIRE_IMMEDIATELY
+        )
+        self.session.headers.update({"User-Agent": "ohio_health_inspections"})
+        retries = ServerErrorRetry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504]
+        )
+        # 429s are left to _get so the shared rate limiter can adapt to them
+        # One connection pool per county host
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=16, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Geocoding results, cached in memory and persisted across runs
+        self.geocode_cache_file = geocode_cache_file
+        self._geocode_cache: Optional[shelve.Shelf] = None
+        self._geocode_memo: Dict[str, Tuple[float, float]] = {}
+        self._geocode_lock = threading.Lock()
+
+        # Uncomment to use geocoding (Nominatim allows at most 1 request/second)
         # self.geolocator = Nominatim(user_agent="ohio_health_inspections")
+        # self.geocode = GeocodeRateLimiter(
+        #     self.geolocator.geocode, min_delay_seconds=1, max_retries=0, swallow_exceptions=False
+        # )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the HTTP session and the geocoding cache."""
+        self.session.close()
+        if self._geocode_cache is not None:
+            self._geocode_cache.close()
+            self._geocode_cache = None
+
+    def _get(self, url: str, max_retries: int = 5, **kwargs) -> requests.Response:
+        """
+        GET a URL through the shared session, respecting the rate limit.
+        Responses of 429 Too Many Requests slow the limiter down and are retried;
+        if the last attempt is still rate limited, HTTPError is raised.
+        """
+        kwargs.setdefault("timeout", 30)
+        for _ in range(max_retries):
+            self.rate_limiter.wait()
+            response = self.session.get(url, **kwargs)
+            if response.status_code != 429:
+                # Every request reaches the server (a 304 comes back as the
+                # cached 200), so only genuine 2xx answers speed the limiter up
+                if 200 <= response.status_code < 300:
+                    self.rate_limiter.success()
+                return response
+            self.rate_limiter.backoff(parse_retry_after(response.headers.get("Retry-After")))
+
+        # Still rate limited after every retry; surface it to the caller
+        response.raise_for_status()
+        return response
 
     def geocode_address(self, address: str) -> tuple:
         """
         Geocode an address to latitude/longitude coordinates.
         You can use a free geocoding service like Nominatim or a paid service like Google Maps.
 
-        For production, consider pre-geocoding addresses and committing the coordinates
-        to avoid API rate limits.
+        Results are cached by normalized address, in memory and on disk in
+        geocode_cache_file, so duplicate addresses and re-runs skip the API.
+        """
+        key = normalize_address(address)
+
+        with self._geocode_lock:
+            coords = self._geocode_memo.get(key)
+            if coords is not None:
+                return coords
+
+            if self._geocode_cache is None:
+                self._geocode_cache = shelve.open(self.geocode_cache_file)
+            coords = self._geocode_cache.get(key)
+
+            if coords is None:
+                coords = self._lookup_coordinates(address)
+                if coords is None:
+                    # Placeholder - return dummy coordinates
+                    print(f"⚠️  Geocoding unavailable. Using placeholder coordinates for: {address}")
+                    return (41.0, -81.5)
+                self._geocode_cache[key] = coords
+                self._geocode_cache.sync()
+
+            self._geocode_memo[key] = coords
+            return coords
+
+    def geocode_batch(self, addresses: Iterable[str]) -> Dict[str, Tuple[float, float]]:
+        """
+        Geocode each unique address once.
+
+        Returns:
+            Mapping of address to (lat, lng) for every non-empty address
+        """
+        return {address: self.geocode_address(address) for address in set(addresses) if address}
+
+    def _lookup_coordinates(self, address: str, max_retries: int = 5) -> Optional[Tuple[float, float]]:
+        """
+        Query the geocoding service directly, bypassing the cache.
+        Returns None while no geocoding service is configured, or if every retry failed.
         """
         # Example using Nominatim (uncomment to use):
-        # try:
-        #     location = self.geolocator.geocode(address)
-        #     if location:
-        #         return (location.latitude, location.longitude)
-        # except GeocoderTimedOut:
-        #     time.sleep(1)
-        #     return self.geocode_address(address)
-        # return (0.0, 0.0)
-
-        # Placeholder - return dummy coordinates
-        print(f"⚠️  Geocoding not implemented. Using placeholder coordinates for: {address}")
-        return (41.0, -81.5)
+        # for attempt in range(max_retries):
+        #     try:
+        #         location = self.geocode(address)
+        #         if location:
+        #             return (location.latitude, location.longitude)
+        #         return (0.0, 0.0)
+        #     except GeocoderRateLimited as e:
+        #         # Honor the server's Retry-After when it sends one
+        #         time.sleep(e.retry_after or 2 ** attempt)
+        #     except (GeocoderTimedOut, GeocoderServiceError):
+        #         time.sleep(2 ** attempt)
+
+        return None
 
     def infer_cuisine_type(self, restaurant_name: str) -> str:
         """
         Attempt to infer cuisine type from restaurant name.
         This is a simple heuristic - manual classification is recommended.
         """
-        name_lower = restaurant_name.lower()
-
-        keywords = {
-            "Italian": ["italian", "pizza", "pizzeria", "pasta", "trattoria"],
-            "Chinese": ["chinese", "china", "wok", "dragon"],
-            "Japanese": ["japanese", "sushi", "hibachi", "ramen"],
-            "Mexican": ["mexican", "taco", "burrito", "cantina", "mexico"],
-            "American": ["diner", "grill", "burger", "steakhouse", "bbq", "bar"],
-            "Indian": ["indian", "india", "curry", "tandoor"],
-            "Thai": ["thai", "thailand"],
-            "Mediterranean": ["mediterranean", "greek", "gyro", "kebab"],
-            "French": ["french", "bistro", "cafe"],
-        }
-
-        for cuisine, words in keywords.items():
-            if any(word in name_lower for word in words):
+        for cuisine, pattern in CUISINE_PATTERNS:
+            if pattern.search(restaurant_name):
                 return cuisine
 
         return "Other"
@@ -98,24 +354,103 @@ class HealthInspectionScraper:
         # Example cities in Summit County
         cities = ["Akron", "Cuyahoga Falls", "Hudson", "Barberton", "Stow"]
 
-        for city in cities:
-            print(f"  Processing {city}...")
-            # TODO: Implement actual scraping logic
-            # This would involve:
-            # 1. Making requests to the site
-            # 2. Parsing HTML with BeautifulSoup
-            # 3. Extracting restaurant data
-            # 4. Following links to inspection details
-            # 5. Parsing violation information
+        # Listing pages are fetched first, then every restaurant's detail page,
+        # all on one worker pool. The shared rate limiter keeps the overall
+        # request rate polite while workers wait on network I/O.
+        listings: List[Dict] = []
+        raw_records: List[Dict] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Results are collected in submission order so the output file
+            # stays stable between runs
+            futures = [executor.submit(self._scrape_city, base_url, city) for city in cities]
+            for city, future in zip(cities, futures):
+                try:
+                    city_listings = future.result()
+                except requests.RequestException as e:
+                    print(f"  ⚠️  Failed to scrape {city}: {e}")
+                    continue
+                print(f"  Processed {city} ({len(city_listings)} restaurants)")
+                listings.extend(city_listings)
+
+            futures = [executor.submit(self._scrape_restaurant, listing) for listing in listings]
+            for listing, future in zip(listings, futures):
+                try:
+                    raw_records.append(future.result())
+                except requests.RequestException as e:
+                    print(f"  ⚠️  Failed to scrape {listing.get('name', 'restaurant')}: {e}")
+
+        # Chains and shared plazas repeat addresses, so geocode each one once
+        geo_map = self.geocode_batch(raw_data.get("address", "") for raw_data in raw_records)
+
+        # Tally cuisines in the same pass so weak classification (lots of
+        # "Other") shows up in the scraper log
+        cuisine_counts: Counter = Counter()
+        for raw_data in raw_records:
+            restaurant = self.parse_inspection_data(raw_data, geo_map)
+            cuisine_counts[restaurant.cuisine] += 1
+            self.merge_restaurant_data(restaurant)
+
+        if cuisine_counts:
+            print("  Cuisines: " + ", ".join(f"{c} {n}" for c, n in cuisine_counts.most_common()))
 
-            # Example placeholder:
-            # response = requests.get(f"{base_url}/search?city={city}")
-            # soup = BeautifulSoup(response.content, 'html.parser')
-            # ... parse and extract data ...
+        print("✅ Summit County scraping complete (template)")
 
-            time.sleep(1)  # Be respectful of the server
+    def _scrape_city(self, base_url: str, city: str) -> List[Dict]:
+        """
+        Fetch and parse the listing page for a single Summit County city.
+        Runs in a worker thread, so it must not touch self.restaurants.
 
-        print("✅ Summit County scraping complete (template)")
+        Returns:
+            Listing entries, each with at least a name and detail_url
+        """
+        listings: List[Dict] = []
+
+        # TODO: Implement actual scraping logic
+        # This would involve:
+        # 1. Making requests to the site
+        # 2. Streaming table rows with iter_table_rows and the compiled XPath above
+        # 3. Extracting restaurant names and detail page links
+        # 4. Handling pagination
+
+        # Example placeholder:
+        # response = self._get(f"{base_url}/search?city={city}")
+        # for row in iter_table_rows(response.content):
+        #     links = _ROW_LINK_XPATH(row)
+        #     if not links:
+        #         continue  # header or spacer row
+        #     link = links[0]
+        #     listings.append({
+        #         "name": "".join(link.itertext()).strip(),
+        #         "detail_url": link.get("href"),
+        #         "county": "Summit"
+        #     })
+
+        return listings
+
+    def _scrape_restaurant(self, listing: Dict) -> Dict:
+        """
+        Fetch a restaurant's detail page and combine it with its listing entry.
+        Runs in a worker thread, so it must not touch self.restaurants.
+
+        Returns:
+            Raw restaurant record suitable for parse_inspection_data
+        """
+        record = dict(listing)
+
+        # TODO: Implement actual scraping logic
+        # This would involve:
+        # 1. Requesting listing["detail_url"]
+        # 2. Extracting the address and inspection history
+        # 3. Parsing violation information
+
+        # Example placeholder:
+        # response = self._get(listing["detail_url"])
+        # Inspection report pages are well-formed XML, parse those with etree:
+        # report = etree.fromstring(response.content)
+        # record["address"] = ...
+        # record["inspections"] = [...]
+
+        return record
 
     def scrape_cuyahoga_county(self):
         """
@@ -168,65 +503,76 @@ class HealthInspectionScraper:
 
         print("✅ Cuyahoga County scraping complete (template)")
 
-    def parse_inspection_data(self, raw_data: Dict) -> Dict:
+    def parse_inspection_data(
+        self,
+        raw_data: Dict,
+        geo_map: Optional[Dict[str, Tuple[float, float]]] = None
+    ) -> Restaurant:
         """
         Parse raw inspection data into the standard format.
 
         Args:
             raw_data: Raw data extracted from the website
+            geo_map: Precomputed coordinates from geocode_batch, keyed by address.
+                     Addresses missing from it are geocoded individually.
 
         Returns:
-            Formatted restaurant data matching the JSON schema
+            Formatted restaurant record matching the JSON schema
         """
         # Example implementation - customize based on actual data structure
-        restaurant = {
-            "id": raw_data.get("id", f"auto-{len(self.restaurants)}"),
-            "name": raw_data.get("name", ""),
-            "address": raw_data.get("address", ""),
-            "lat": 0.0,
-            "lng": 0.0,
-            "county": raw_data.get("county", ""),
-            "cuisine": self.infer_cuisine_type(raw_data.get("name", "")),
-            "inspections": []
-        }
+        name = raw_data.get("name", "")
+        address = raw_data.get("address", "")
 
         # Geocode the address
-        if restaurant["address"]:
-            lat, lng = self.geocode_address(restaurant["address"])
-            restaurant["lat"] = lat
-            restaurant["lng"] = lng
+        lat, lng = 0.0, 0.0
+        if address:
+            coords = geo_map.get(address) if geo_map else None
+            lat, lng = coords or self.geocode_address(address)
+
+        restaurant = Restaurant(
+            # Only build the fallback id when the source record has none
+            id=raw_data.get("id") or f"auto-{len(self.restaurants)}",
+            name=name,
+            address=address,
+            lat=lat,
+            lng=lng,
+            county=raw_data.get("county", ""),
+            cuisine=self.infer_cuisine_type(name)
+        )
 
         # Parse inspections
         for inspection in raw_data.get("inspections", []):
-            formatted_inspection = {
-                "date": inspection.get("date", ""),
-                "critical_violations": 0,
-                "violations": []
-            }
-
-            for violation in inspection.get("violations", []):
-                formatted_violation = {
-                    "description": violation.get("description", ""),
-                    "critical": violation.get("is_critical", False)
-                }
-                formatted_inspection["violations"].append(formatted_violation)
-
-                if formatted_violation["critical"]:
-                    formatted_inspection["critical_violations"] += 1
-
-            restaurant["inspections"].append(formatted_inspection)
+            violations = [
+                Violation(
+                    description=violation.get("description", ""),
+                    critical=violation.get("is_critical", False)
+                )
+                for violation in inspection.get("violations", [])
+            ]
+
+            restaurant.inspections.append(Inspection(
+                date=inspection.get("date", ""),
+                critical_violations=sum(1 for v in violations if v.critical),
+                violations=violations
+            ))
 
         return restaurant
 
     def save_data(self):
         """Save collected data to JSON file."""
-        output_data = {
-            "lastUpdated": datetime.now().isoformat() + "Z",
-            "restaurants": self.restaurants
-        }
-
-        with open(self.output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        last_updated = orjson.dumps(
+            datetime.now(timezone.utc),
+            option=orjson.OPT_UTC_Z | orjson.OPT_OMIT_MICROSECONDS
+        )
+
+        # Write one restaurant at a time so the whole document is never held
+        # in memory as a single buffer. Output matches OPT_INDENT_2 formatting.
+        with open(self.output_file, 'wb') as f:
+            f.write(b'{\n  "lastUpdated": ' + last_updated + b',\n  "restaurants": [')
+            for idx, restaurant in enumerate(self.restaurants):
+                f.write(b',\n    ' if idx else b'\n    ')
+                f.write(orjson.dumps(restaurant, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n    '))
+            f.write(b'\n  ]\n}' if self.restaurants else b']\n}')
 
         print(f"✅ Data saved to {self.output_file}")
         print(f"   Total restaurants: {len(self.restaurants)}")
@@ -234,30 +580,34 @@ class HealthInspectionScraper:
     def load_existing_data(self):
         """Load existing data to merge with new scrapes."""
         try:
-            with open(self.output_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.restaurants = data.get("restaurants", [])
+            with open(self.output_file, 'rb') as f:
+                data = orjson.loads(f.read())
+                self.restaurants = [Restaurant.from_dict(r) for r in data.get("restaurants", [])]
+                self._id_index = {r.id: idx for idx, r in enumerate(self.restaurants)}
+                self._inspection_dates = {}
                 print(f"📂 Loaded {len(self.restaurants)} existing restaurants")
         except FileNotFoundError:
             print("📂 No existing data found, starting fresh")
 
-    def merge_restaurant_data(self, new_restaurant: Dict):
+    def merge_restaurant_data(self, new_restaurant: Restaurant):
         """Merge new restaurant data with existing data."""
         # Find if restaurant already exists
-        existing_idx = None
-        for idx, restaurant in enumerate(self.restaurants):
-            if restaurant["id"] == new_restaurant["id"]:
-                existing_idx = idx
-                break
+        existing_idx = self._id_index.get(new_restaurant.id)
 
         if existing_idx is not None:
             # Merge inspections, keeping unique ones
-            existing_dates = {i["date"] for i in self.restaurants[existing_idx]["inspections"]}
-            for inspection in new_restaurant["inspections"]:
-                if inspection["date"] not in existing_dates:
-                    self.restaurants[existing_idx]["inspections"].append(inspection)
+            existing = self.restaurants[existing_idx]
+            existing_dates = self._inspection_dates.get(existing.id)
+            if existing_dates is None:
+                existing_dates = {i.date for i in existing.inspections}
+                self._inspection_dates[existing.id] = existing_dates
+            for inspection in new_restaurant.inspections:
+                if inspection.date not in existing_dates:
+                    existing.inspections.append(inspection)
+                    existing_dates.add(inspection.date)
         else:
             # Add new restaurant
+            self._id_index[new_restaurant.id] = len(self.restaurants)
             self.restaurants.append(new_restaurant)
 
 def main():
@@ -283,23 +633,22 @@ def main():
 
     args = parser.parse_args()
 
-    scraper = HealthInspectionScraper(output_file=args.output)
-
-    if args.merge:
-        scraper.load_existing_data()
+    with HealthInspectionScraper(output_file=args.output) as scraper:
+        if args.merge:
+            scraper.load_existing_data()
 
-    print("🚀 Starting health inspection data scraper")
-    print(f"   Target: {args.county.title()} County")
-    print()
+        print("🚀 Starting health inspection data scraper")
+        print(f"   Target: {args.county.title()} County")
+        print()
 
-    if args.county in ["summit", "all"]:
-        scraper.scrape_summit_county()
+        if args.county in ["summit", "all"]:
+            scraper.scrape_summit_county()
 
-    if args.county in ["cuyahoga", "all"]:
-        scraper.scrape_cuyahoga_county()
+        if args.county in ["cuyahoga", "all"]:
+            scraper.scrape_cuyahoga_county()
 
-    print()
-    scraper.save_data()
+        print()
+        scraper.save_data()
     print()
     print("=" * 60)
     print("⚠️  IMPORTANT NOTES:")